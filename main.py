@@ -10,18 +10,6 @@ Features:
 """
 
 import argparse
-import sys
-import os
-
-def run_dependency_parser(args):
-    from src.enhanced_ninja_parser import main as ninja_main
-    sys.argv = ["enhanced_ninja_parser.py"] + args
-    ninja_main()
-
-def run_selective_test_filter(args):
-    from src.selective_test_filter import main as filter_main
-    sys.argv = ["selective_test_filter.py"] + args
-    filter_main()
 
 def main():
     parser = argparse.ArgumentParser(description="Unified Ninja Dependency & Selective Testing Tool")
@@ -32,6 +20,8 @@ def main():
     parser_parse.add_argument("build_ninja", help="Path to build.ninja")
     parser_parse.add_argument("--ninja", help="Path to ninja executable", default="ninja")
     parser_parse.add_argument("--workspace-root", help="Path to workspace root", default=None)
+    parser_parse.add_argument("--no-cache", action="store_true", help="Ignore any cached dependency map and re-parse")
+    parser_parse.add_argument("--compress", action="store_true", help="Also write zstd-compressed copies of the JSON exports")
 
     # Selective testing
     parser_test = subparsers.add_parser("select", help="Selective test filtering between git refs")
@@ -53,24 +43,24 @@ def main():
 
     args = parser.parse_args()
 
+    # Call the submodule entry points directly with typed arguments instead
+    # of round-tripping through sys.argv and a second argv parse
     if args.command == "parse":
-        parse_args = [args.build_ninja, args.ninja]
-        if args.workspace_root:
-            parse_args.append(args.workspace_root)
-        run_dependency_parser(parse_args)
+        from src.enhanced_ninja_parser import run_parser
+        run_parser(args.build_ninja, args.ninja,
+                   workspace_root=args.workspace_root or "..",
+                   use_cache=not args.no_cache,
+                   compress=args.compress)
     elif args.command == "select":
-        filter_args = [args.depmap_json, args.ref1, args.ref2]
-        if args.test_prefix:
-            filter_args.append("--test-prefix")
-        if args.all:
-            filter_args.append("--all")
-        if args.output:
-            filter_args += ["--output", args.output]
-        run_selective_test_filter(filter_args)
+        from src.selective_test_filter import run_select
+        filter_mode = "test_prefix" if args.test_prefix and not args.all else "all"
+        run_select(args.depmap_json, args.ref1, args.ref2, filter_mode, args.output)
     elif args.command == "audit":
-        run_selective_test_filter([args.depmap_json, "--audit"])
+        from src.selective_test_filter import run_audit
+        run_audit(args.depmap_json)
     elif args.command == "optimize":
-        run_selective_test_filter([args.depmap_json, "--optimize-build"] + args.changed_files)
+        from src.selective_test_filter import run_optimize_build
+        run_optimize_build(args.depmap_json, args.changed_files)
     else:
         parser.print_help()
 
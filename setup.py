@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""Builds the optional _ninjadeps Cython extension.
+
+The tools run fine without it (a pure-Python reader is the fallback);
+compiling it speeds up .ninja_deps parsing considerably:
+
+    pip install cython && python setup.py build_ext --inplace
+"""
+
+from setuptools import Extension, setup
+
+try:
+    from Cython.Build import cythonize
+    ext_modules = cythonize(
+        [Extension("src._ninjadeps", ["src/_ninjadeps.pyx"])],
+        language_level=3)
+except ImportError:
+    ext_modules = []
+
+setup(
+    name="dependency-parser",
+    ext_modules=ext_modules,
+)
@@ -0,0 +1,79 @@
+# cython: language_level=3, boundscheck=False, wraparound=False
+"""Compiled hot kernel for parsing ninja's binary .ninja_deps log.
+
+Build in place with:
+
+    python setup.py build_ext --inplace
+
+enhanced_ninja_parser imports this when available and otherwise falls
+back to its pure-Python reader; both produce the same mapping.
+"""
+
+import sys
+
+from cpython.bytes cimport PyBytes_FromStringAndSize
+from libc.stdint cimport uint32_t
+
+
+def parse_ninjadeps(path, workspace_prefix):
+    """Return {object_path: [dep_paths]} parsed from a .ninja_deps file.
+
+    Paths starting with workspace_prefix have it stripped; all paths are
+    interned so duplicate deps share one string object.
+    """
+    cdef bytes blob
+    with open(path, 'rb') as f:
+        blob = f.read()
+
+    cdef const unsigned char* buf = blob
+    cdef Py_ssize_t size = len(blob)
+    if size < 16 or blob[:12] != b'# ninjadeps\n':
+        raise ValueError(f"not a ninja deps log: {path}")
+    cdef uint32_t version = (<const uint32_t*>(buf + 12))[0]
+    if version != 3 and version != 4:
+        raise ValueError(f"unsupported ninja deps log version {version}")
+
+    cdef int mtime_size = 8 if version == 4 else 4
+    cdef Py_ssize_t prefix_len = len(workspace_prefix)
+    cdef Py_ssize_t offset = 16
+    cdef Py_ssize_t payload_size, path_len, i, dep_count, n_paths
+    cdef uint32_t header, out_id
+    cdef const uint32_t* dep_ids
+
+    paths = []
+    object_to_deps = {}
+    while offset + 4 <= size:
+        header = (<const uint32_t*>(buf + offset))[0]
+        offset += 4
+        payload_size = header & 0x7FFFFFFF
+        if offset + payload_size > size:
+            break  # Truncated trailing record; ninja tolerates this too
+        if header & 0x80000000U:
+            out_id = (<const uint32_t*>(buf + offset))[0]
+            dep_count = (payload_size - 4 - mtime_size) // 4
+            dep_ids = <const uint32_t*>(buf + offset + 4 + mtime_size)
+            # With boundscheck off the list lookups below are unchecked, so
+            # ids in a corrupt log must be validated against the path table
+            n_paths = len(paths)
+            if <Py_ssize_t>out_id >= n_paths:
+                raise ValueError(f"deps record references unknown path id {out_id}")
+            deps = [None] * dep_count
+            for i in range(dep_count):
+                if <Py_ssize_t>dep_ids[i] >= n_paths:
+                    raise ValueError(f"deps record references unknown path id {dep_ids[i]}")
+                deps[i] = paths[dep_ids[i]]
+            # Later records supersede earlier ones for the same output
+            object_to_deps[paths[out_id]] = deps
+        else:
+            # NUL padding aligns the path to 4 bytes; the last uint32 is
+            # a checksum of the path's id
+            path_len = payload_size - 4
+            while path_len > 0 and buf[offset + path_len - 1] == 0:
+                path_len -= 1
+            text = PyBytes_FromStringAndSize(<const char*>(buf + offset), path_len).decode()
+            if prefix_len and text.startswith(workspace_prefix):
+                text = text[prefix_len:]
+            paths.append(sys.intern(text))
+        offset += payload_size
+
+    return object_to_deps
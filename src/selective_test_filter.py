@@ -25,13 +25,38 @@ Options:
 import sys
 import subprocess
 import json
+import mmap
 import os
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Only these file types can appear in the dependency mapping, so the git
+# pathspec filters everything else before it crosses the Python boundary
+CODE_FILE_PATHSPEC = ["*.c", "*.cc", "*.cpp", "*.cxx", "*.h", "*.hpp", "*.hip", "*.cu"]
+
 def get_changed_files(ref1, ref2):
-    """Return a set of files changed between two git refs."""
+    """Return a set of code files changed between two git refs.
+
+    Rename detection (-M) plus --diff-filter=ACMR keeps deleted paths out
+    of the result; they cannot match the dependency mapping anyway.
+    """
     try:
         result = subprocess.run(
-            ["git", "diff", "--name-only", ref1, ref2],
+            ["git", "diff", "--name-only", "-M", "--diff-filter=ACMR", ref1, ref2,
+             "--"] + CODE_FILE_PATHSPEC,
             capture_output=True, text=True, check=True
         )
         files = set(line.strip() for line in result.stdout.splitlines() if line.strip())
@@ -41,68 +66,114 @@ def get_changed_files(ref1, ref2):
         sys.exit(1)
 
 def load_depmap(depmap_json):
-    """Load the dependency mapping JSON."""
-    with open(depmap_json, "r") as f:
-        data = json.load(f)
+    """Load the file->executables mapping from the dependency JSON.
+
+    Only the "file_to_executables" half of the export is needed here; with
+    ijson installed that sub-object is streamed without materializing the
+    reverse mapping, and with orjson the full parse is still much faster
+    than stdlib json. Files holding the mapping directly (the split
+    file_to_executables.json export, or the old format) also load fine,
+    as do zstd-compressed .zst exports.
+    """
+    if depmap_json.endswith(".zst"):
+        if zstandard is None:
+            print(f"zstandard is required to load compressed depmap: {depmap_json}")
+            sys.exit(1)
+        with open(depmap_json, "rb") as f:
+            raw = zstandard.ZstdDecompressor().stream_reader(f).read()
+        data = orjson.loads(raw) if orjson is not None else json.loads(raw)
+    elif orjson is not None:
+        with open(depmap_json, "rb") as f:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buf:
+                data = orjson.loads(memoryview(buf))
+    elif ijson is not None:
+        with open(depmap_json, "rb") as f:
+            data = dict(ijson.kvitems(f, "file_to_executables"))
+        if data:
+            return data
+        with open(depmap_json, "r") as f:
+            data = json.load(f)
+    else:
+        with open(depmap_json, "r") as f:
+            data = json.load(f)
     # Support both old and new formats
     if "file_to_executables" in data:
         return data["file_to_executables"]
     return data
 
 def select_tests(file_to_executables, changed_files, filter_mode):
-    """Return a set of test executables affected by changed files."""
-    affected = set()
-    for f in changed_files:
-        if f in file_to_executables:
-            for exe in file_to_executables[f]:
-                if filter_mode == "all":
-                    affected.add(exe)
-                elif filter_mode == "test_prefix" and exe.startswith("test_"):
-                    affected.add(exe)
+    """Return the sorted list of test executables affected by changed files."""
+    # dict views support set operations at C speed, so intersect first and
+    # union the matching executable lists in one shot
+    hits = changed_files & file_to_executables.keys()
+    affected = set().union(*(file_to_executables[f] for f in hits)) if hits else set()
+    if filter_mode == "test_prefix":
+        affected = {exe for exe in affected if exe.startswith("test_")}
     return sorted(affected)
 
+def _require_depmap(depmap_json):
+    """Exit with a message if the dependency map JSON is missing."""
+    if not os.path.exists(depmap_json):
+        print(f"Dependency map JSON not found: {depmap_json}")
+        sys.exit(1)
+
+def run_audit(depmap_json):
+    """List every mapped file with its dependent executables."""
+    _require_depmap(depmap_json)
+    file_to_executables = load_depmap(depmap_json)
+    for f, exes in file_to_executables.items():
+        print(f"{f}: {', '.join(exes)}")
+    print(f"Total files: {len(file_to_executables)}")
+
+def run_optimize_build(depmap_json, changed_files):
+    """Print the executables affected by an explicit list of changed files."""
+    _require_depmap(depmap_json)
+    file_to_executables = load_depmap(depmap_json)
+    affected_executables = set()
+    for f in set(changed_files):
+        if f in file_to_executables:
+            affected_executables.update(file_to_executables[f])
+    print("Affected executables:")
+    for exe in sorted(affected_executables):
+        print(exe)
+    print(f"Total affected executables: {len(affected_executables)}")
+
+def run_select(depmap_json, ref1, ref2, filter_mode="all", output_json="tests-to-run.json"):
+    """Export the tests affected by the changes between two git refs."""
+    _require_depmap(depmap_json)
+
+    changed_files = get_changed_files(ref1, ref2)
+    if not changed_files:
+        print("No changed files detected.")
+        tests = []
+    else:
+        file_to_executables = load_depmap(depmap_json)
+        tests = select_tests(file_to_executables, changed_files, filter_mode)
+
+    with open(output_json, "w") as f:
+        json.dump({"tests_to_run": tests, "changed_files": sorted(changed_files)}, f, indent=2)
+
+    print(f"Exported {len(tests)} tests to run to {output_json}")
+
 def main():
     if "--audit" in sys.argv:
         if len(sys.argv) < 2:
             print("Usage: python selective_test_filter.py <depmap_json> --audit")
             sys.exit(1)
-        depmap_json = sys.argv[1]
-        if not os.path.exists(depmap_json):
-            print(f"Dependency map JSON not found: {depmap_json}")
-            sys.exit(1)
-        file_to_executables = load_depmap(depmap_json)
-        for f, exes in file_to_executables.items():
-            print(f"{f}: {', '.join(exes)}")
-        print(f"Total files: {len(file_to_executables)}")
+        run_audit(sys.argv[1])
         sys.exit(0)
 
     if "--optimize-build" in sys.argv:
         if len(sys.argv) < 3:
             print("Usage: python selective_test_filter.py <depmap_json> --optimize-build <changed_file1> [<changed_file2> ...]")
             sys.exit(1)
-        depmap_json = sys.argv[1]
-        changed_files = set(sys.argv[sys.argv.index("--optimize-build") + 1 :])
-        if not os.path.exists(depmap_json):
-            print(f"Dependency map JSON not found: {depmap_json}")
-            sys.exit(1)
-        file_to_executables = load_depmap(depmap_json)
-        affected_executables = set()
-        for f in changed_files:
-            if f in file_to_executables:
-                affected_executables.update(file_to_executables[f])
-        print("Affected executables:")
-        for exe in sorted(affected_executables):
-            print(exe)
-        print(f"Total affected executables: {len(affected_executables)}")
+        run_optimize_build(sys.argv[1], sys.argv[sys.argv.index("--optimize-build") + 1 :])
         sys.exit(0)
 
     if len(sys.argv) < 4:
         print("Usage: python selective_test_filter.py <depmap_json> <ref1> <ref2> [--all | --test-prefix] [--output <output_json>]")
         sys.exit(1)
 
-    depmap_json = sys.argv[1]
-    ref1 = sys.argv[2]
-    ref2 = sys.argv[3]
     filter_mode = "all"
     output_json = "tests-to-run.json"
 
@@ -115,22 +186,7 @@ def main():
         if idx + 1 < len(sys.argv):
             output_json = sys.argv[idx + 1]
 
-    if not os.path.exists(depmap_json):
-        print(f"Dependency map JSON not found: {depmap_json}")
-        sys.exit(1)
-
-    changed_files = get_changed_files(ref1, ref2)
-    if not changed_files:
-        print("No changed files detected.")
-        tests = []
-    else:
-        file_to_executables = load_depmap(depmap_json)
-        tests = select_tests(file_to_executables, changed_files, filter_mode)
-
-    with open(output_json, "w") as f:
-        json.dump({"tests_to_run": tests, "changed_files": sorted(changed_files)}, f, indent=2)
-
-    print(f"Exported {len(tests)} tests to run to {output_json}")
+    run_select(sys.argv[1], sys.argv[2], sys.argv[3], filter_mode, output_json)
 
 if __name__ == "__main__":
     main()